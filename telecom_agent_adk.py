@@ -0,0 +1,923 @@
+# ADK COMPONENTS OF THE TELECOM AGENT SYSTEM
+#
+# Models, plugins, agents, memory and tools that subclass google.adk types.
+# telecom_agent_solution imports this module on first use, so processes that
+# only need the tools, workflows or observer never load google.adk.
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncGenerator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from google.adk.agents import BaseAgent
+from google.adk.events import Event
+from google.adk.memory import BaseMemoryService
+from google.adk.memory.base_memory_service import SearchMemoryResponse
+from google.adk.memory.memory_entry import MemoryEntry
+from google.adk.models import BaseLlm, LlmCapabilities, LlmRequest, LlmResponse
+from google.adk.models.google_llm import Gemini
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools import AgentTool
+from google.adk.tools.base_tool import BaseTool
+from google.genai import types
+from pydantic import Field, PrivateAttr
+
+from telecom_agent_solution import (
+    MEMORY_RECALL_HEADER,
+    A2aEndpoint,
+    AgentUsage,
+    SimulatedModelError,
+    Span,
+    _content_chars,
+    _current_span,
+    _query_usage,
+    a2a_card_path,
+    hashing_embed,
+    is_model_backend_error,
+    logger,
+    observer,
+)
+
+
+class OfflineLlm(BaseLlm):
+    """
+    Deterministic local stand-in for Gemini, for offline runs and benchmarks
+    
+    Replies are picked from `responses` (first keyword found in the latest
+    user text, case-insensitive) or `default_response`; templates may use
+    {query}, {agent} and {memory} (the top memory MemoryRecallTool added
+    to the request, or "nothing"). Before answering, the model calls each tool named
+    in `tool_calls` that the requesting agent actually has, once per turn,
+    with arguments from `tool_args` (AgentTools default to the query).
+    `latency_ms` +/- `latency_jitter_ms` is slept per call and `error_rate`
+    of calls raise SimulatedModelError. Randomness is seeded by `seed`.
+    """
+    
+    model: str = "offline-stand-in"
+    responses: Dict[str, str] = Field(default_factory=dict)
+    default_response: str = "[{agent}] Thank you for contacting us. Regarding \"{query}\": your request has been reviewed and resolved."
+    tool_calls: List[str] = Field(default_factory=list)
+    tool_args: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+    
+    _rng: random.Random = PrivateAttr()
+    
+    def model_post_init(self, __context: Any):
+        self._rng = random.Random(self.seed)
+    
+    @property
+    def capabilities(self) -> "LlmCapabilities":
+        return LlmCapabilities(output_schema_and_tools=True)
+    
+    @classmethod
+    def supported_models(cls) -> List[str]:
+        return [r"offline-.*"]
+    
+    @staticmethod
+    def _latest_user_text(llm_request: LlmRequest) -> str:
+        for content in reversed(llm_request.contents):
+            if content.role != "user":
+                continue
+            texts = [part.text for part in content.parts or [] if part.text]
+            if texts:
+                return "\n".join(texts)
+        return ""
+    
+    @staticmethod
+    def _recalled_memory(llm_request: LlmRequest) -> Optional[str]:
+        instruction = llm_request.config.system_instruction
+        if not isinstance(instruction, str) or MEMORY_RECALL_HEADER not in instruction:
+            return None
+        recalled = instruction.split(MEMORY_RECALL_HEADER, 1)[1].strip().splitlines()
+        return recalled[0][2:] if recalled and recalled[0].startswith("- ") else None
+    
+    @staticmethod
+    def _tools_called_this_turn(llm_request: LlmRequest) -> set:
+        called = set()
+        for content in reversed(llm_request.contents):
+            parts = content.parts or []
+            if content.role == "user" and any(part.text for part in parts):
+                break
+            called.update(part.function_call.name for part in parts if part.function_call)
+        return called
+    
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        delay_ms = self.latency_ms + self._rng.uniform(-self.latency_jitter_ms, self.latency_jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise SimulatedModelError(f"{self.model}: simulated 503 from model backend")
+        
+        query = self._latest_user_text(llm_request)
+        prompt_tokens = sum(
+            len(part.text or "") for content in llm_request.contents for part in content.parts or []
+        ) // 4 + 1
+        
+        called = self._tools_called_this_turn(llm_request)
+        pending_tool = next(
+            (name for name in self.tool_calls
+             if name in llm_request.tools_dict and name not in called),
+            None
+        )
+        if pending_tool is not None:
+            args = self.tool_args.get(pending_tool)
+            if args is None:
+                args = {"request": query} if isinstance(llm_request.tools_dict[pending_tool], AgentTool) else {}
+            yield LlmResponse(
+                content=types.Content(role="model", parts=[
+                    types.Part(function_call=types.FunctionCall(name=pending_tool, args=args))
+                ]),
+                usage_metadata=types.GenerateContentResponseUsageMetadata(
+                    prompt_token_count=prompt_tokens, candidates_token_count=8,
+                    total_token_count=prompt_tokens + 8
+                )
+            )
+            return
+        
+        lowered = query.lower()
+        template = next(
+            (reply for keyword, reply in self.responses.items() if keyword.lower() in lowered),
+            self.default_response
+        )
+        agent_name = (llm_request.config.labels or {}).get("adk_agent_name", self.model)
+        text = template.replace("{query}", query.strip()).replace("{agent}", agent_name)
+        if "{memory}" in text:
+            text = text.replace("{memory}", self._recalled_memory(llm_request) or "nothing")
+        output_tokens = len(text) // 4 + 1
+        usage = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens, candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens
+        )
+        
+        if stream:
+            words = text.split(" ")
+            for start in range(0, len(words), 4):
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[
+                        types.Part(text=" ".join(words[start:start + 4]) + " ")
+                    ]),
+                    partial=True
+                )
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            usage_metadata=usage,
+            turn_complete=True
+        )
+
+
+class PooledGemini(Gemini):
+    """Gemini that sends through a ModelClientRegistry's shared client"""
+    
+    client_name: str = "default"
+    registry: Any = Field(default=None, exclude=True)
+    
+    async def generate_content_async(
+        self, llm_request: Any, stream: bool = False
+    ) -> AsyncGenerator[Any, None]:
+        policy = self.registry.policy_for(self.client_name)
+        http_options = llm_request.config.http_options or types.HttpOptions()
+        if http_options.timeout is None:
+            http_options.timeout = int(policy.timeout_s * 1000)
+        # Retries happen here rather than in the client, so each one is
+        # paid for from the shared retry budget
+        http_options.retry_options = types.HttpRetryOptions(attempts=1)
+        llm_request.config.http_options = http_options
+        # A copy bound through Gemini's `client` field to the pooled client of
+        # this event loop; Gemini adds its tracking headers to every request
+        pinned = self.model_copy(update={"client": self.registry.shared_client()})
+        
+        budget = self.registry.retry_budget
+        budget.record_request()
+        retry = 0
+        while True:
+            started = time.perf_counter()
+            ok = False
+            yielded = False
+            self.registry._begin(self.client_name)
+            try:
+                async for response in Gemini.generate_content_async(pinned, llm_request, stream):
+                    yielded = True
+                    yield response
+                ok = True
+                return
+            except Exception as e:
+                if (yielded or retry + 1 >= policy.attempts
+                        or not is_model_backend_error(e, policy.http_status_codes)):
+                    raise
+                if not budget.try_spend():
+                    observer.increment("model_client.retry_budget_exhausted", agent_name=self.client_name)
+                    raise
+            finally:
+                self.registry._end(self.client_name, (time.perf_counter() - started) * 1000, ok)
+            observer.increment("model_client.retries", agent_name=self.client_name)
+            await asyncio.sleep(policy.backoff_s(retry))
+            retry += 1
+
+
+class SpanTracingPlugin(BasePlugin):
+    """
+    Opens observer spans around agent turns, model calls and tool calls
+    Runners pass plugins down to AgentTool sub-runners, so specialist
+    turns nest under the orchestrator's tool call in the same trace.
+    """
+    
+    def __init__(self, name: str = "span_tracing"):
+        super().__init__(name=name)
+        self._open: Dict[Tuple[str, ...], Tuple[Span, Optional[Span]]] = {}
+    
+    def _open_span(self, key: Tuple[str, ...], name: str, attributes: Dict[str, Any], make_current: bool):
+        span = observer.start_span(name, attributes)
+        self._open[key] = (span, _current_span.get())
+        if make_current:
+            _current_span.set(span)
+    
+    def _close_span(self, key: Tuple[str, ...], error: Optional[BaseException] = None, restore: bool = False):
+        entry = self._open.pop(key, None)
+        if entry is None:
+            return
+        span, previous = entry
+        if restore:
+            _current_span.set(previous)
+        observer.end_span(span, error)
+    
+    async def before_agent_callback(self, *, agent: Any, callback_context: Any) -> None:
+        self._open_span(
+            ("agent", callback_context.invocation_id, agent.name),
+            f"agent.{agent.name}", {"agent": agent.name}, make_current=True
+        )
+    
+    async def after_agent_callback(self, *, agent: Any, callback_context: Any) -> None:
+        self._close_span(("agent", callback_context.invocation_id, agent.name), restore=True)
+    
+    async def on_agent_error_callback(self, *, agent: Any, callback_context: Any, error: Exception) -> None:
+        self._close_span(("agent", callback_context.invocation_id, agent.name), error, restore=True)
+    
+    async def before_model_callback(self, *, callback_context: Any, llm_request: Any) -> None:
+        self._open_span(
+            ("model", callback_context.invocation_id, callback_context.agent_name),
+            f"model.{callback_context.agent_name}",
+            {"agent": callback_context.agent_name, "model": str(llm_request.model)},
+            make_current=False
+        )
+    
+    async def after_model_callback(self, *, callback_context: Any, llm_response: Any) -> None:
+        if llm_response.partial:
+            return None
+        self._close_span(("model", callback_context.invocation_id, callback_context.agent_name))
+    
+    async def on_model_error_callback(self, *, callback_context: Any, llm_request: Any, error: Exception) -> None:
+        self._close_span(("model", callback_context.invocation_id, callback_context.agent_name), error)
+    
+    async def before_tool_callback(self, *, tool: Any, tool_args: Dict[str, Any], tool_context: Any) -> None:
+        self._open_span(
+            ("tool", tool_context.invocation_id, tool_context.function_call_id or tool.name),
+            f"tool_call.{tool.name}", {"tool": tool.name}, make_current=True
+        )
+    
+    async def after_tool_callback(
+        self, *, tool: Any, tool_args: Dict[str, Any], tool_context: Any, result: Any
+    ) -> None:
+        self._close_span(
+            ("tool", tool_context.invocation_id, tool_context.function_call_id or tool.name), restore=True
+        )
+    
+    async def on_tool_error_callback(
+        self, *, tool: Any, tool_args: Dict[str, Any], tool_context: Any, error: Exception
+    ) -> None:
+        self._close_span(
+            ("tool", tool_context.invocation_id, tool_context.function_call_id or tool.name), error, restore=True
+        )
+    
+    async def after_run_callback(self, *, invocation_context: Any) -> None:
+        # Close anything a cancelled or failed turn left open
+        for key in [key for key in self._open if key[1] == invocation_context.invocation_id]:
+            self._close_span(key)
+
+
+class UsageAccountingPlugin(BasePlugin):
+    """
+    Counts model calls, tokens, tool calls and time per agent
+    Totals go to the observer under "agent_usage.*" (per agent) and to
+    the current query's QueryUsage, if one is active. The size of each
+    prompt actually sent (after any history compaction) is recorded
+    under "prompt_size.*".
+    """
+    
+    def __init__(self, name: str = "usage_accounting"):
+        super().__init__(name=name)
+        self._started: Dict[Tuple[str, str, str], float] = {}
+    
+    @staticmethod
+    def _usage_for(agent_name: str) -> Optional[AgentUsage]:
+        query_usage = _query_usage.get()
+        return query_usage.agent(agent_name) if query_usage is not None else None
+    
+    def _elapsed_ms(self, key: Tuple[str, str, str]) -> Optional[float]:
+        started = self._started.pop(key, None)
+        return (time.perf_counter() - started) * 1000 if started is not None else None
+    
+    async def before_agent_callback(self, *, agent: Any, callback_context: Any) -> None:
+        self._started[("agent", callback_context.invocation_id, agent.name)] = time.perf_counter()
+    
+    async def after_agent_callback(self, *, agent: Any, callback_context: Any) -> None:
+        elapsed_ms = self._elapsed_ms(("agent", callback_context.invocation_id, agent.name))
+        if elapsed_ms is None:
+            return None
+        observer.record_metric("agent_usage.wall_ms", elapsed_ms, agent_name=agent.name)
+        usage = self._usage_for(agent.name)
+        if usage is not None:
+            usage.wall_ms += elapsed_ms
+    
+    async def before_model_callback(self, *, callback_context: Any, llm_request: Any) -> None:
+        agent_name = callback_context.agent_name
+        self._started[("model", callback_context.invocation_id, agent_name)] = time.perf_counter()
+        # The session only holds the loaded window of history, so the
+        # uncompacted size is not measurable here; compare runs instead
+        observer.record_metric(
+            "prompt_size.chars",
+            sum(_content_chars(content) for content in llm_request.contents),
+            agent_name=agent_name
+        )
+        observer.record_metric("prompt_size.contents", len(llm_request.contents), agent_name=agent_name)
+    
+    async def after_model_callback(self, *, callback_context: Any, llm_response: Any) -> None:
+        if llm_response.partial:
+            return None
+        agent_name = callback_context.agent_name
+        elapsed_ms = self._elapsed_ms(("model", callback_context.invocation_id, agent_name)) or 0.0
+        metadata = llm_response.usage_metadata
+        prompt_tokens = (metadata.prompt_token_count or 0) if metadata else 0
+        output_tokens = (
+            (metadata.candidates_token_count or 0) + (metadata.thoughts_token_count or 0)
+        ) if metadata else 0
+        cached_tokens = (metadata.cached_content_token_count or 0) if metadata else 0
+        
+        observer.increment("agent_usage.llm_calls", agent_name=agent_name)
+        observer.increment("agent_usage.prompt_tokens", prompt_tokens, agent_name=agent_name)
+        observer.increment("agent_usage.output_tokens", output_tokens, agent_name=agent_name)
+        observer.record_metric("agent_usage.model_ms", elapsed_ms, agent_name=agent_name)
+        usage = self._usage_for(agent_name)
+        if usage is not None:
+            usage.llm_calls += 1
+            usage.prompt_tokens += prompt_tokens
+            usage.output_tokens += output_tokens
+            usage.cached_tokens += cached_tokens
+            usage.model_ms += elapsed_ms
+    
+    async def on_model_error_callback(self, *, callback_context: Any, llm_request: Any, error: Exception) -> None:
+        agent_name = callback_context.agent_name
+        self._elapsed_ms(("model", callback_context.invocation_id, agent_name))
+        observer.increment("agent_usage.model_errors", agent_name=agent_name)
+        usage = self._usage_for(agent_name)
+        if usage is not None:
+            usage.model_errors += 1
+    
+    async def before_tool_callback(self, *, tool: Any, tool_args: Dict[str, Any], tool_context: Any) -> None:
+        observer.increment("agent_usage.tool_calls", agent_name=tool_context.agent_name)
+        usage = self._usage_for(tool_context.agent_name)
+        if usage is not None:
+            usage.tool_calls += 1
+    
+    async def after_run_callback(self, *, invocation_context: Any) -> None:
+        for key in [key for key in self._started if key[1] == invocation_context.invocation_id]:
+            del self._started[key]
+
+
+class A2aSpecialistPool(BaseAgent):
+    """
+    A specialist served by several A2A replicas, used like the local agent
+    Each call goes to one healthy replica picked by `balancing`
+    ("least_loaded": fewest in-flight calls, or "round_robin"). A replica
+    whose call fails before producing output is skipped for the rest of
+    the call (failover) and marked unhealthy after `unhealthy_after`
+    failures in a row; a background check fetches every replica's agent
+    card each `health_interval_s` and brings it back once it answers.
+    """
+    
+    endpoints: List[str]
+    balancing: str = "least_loaded"
+    health_interval_s: float = 5.0
+    unhealthy_after: int = 2
+    timeout_s: float = 60.0
+    
+    _members: List[A2aEndpoint] = PrivateAttr(default_factory=list)
+    _next: int = PrivateAttr(default=0)
+    _health_task: Optional[asyncio.Task] = PrivateAttr(default=None)
+    
+    def model_post_init(self, __context: Any):
+        from google.adk.a2a.agent import RemoteA2aAgent
+        super().model_post_init(__context)
+        if self.balancing not in ("least_loaded", "round_robin"):
+            raise ValueError(f"Unknown balancing strategy {self.balancing!r}")
+        # Replicas get their own names so plugin spans/usage nest under the pool
+        self._members = [
+            A2aEndpoint(url=url, agent=RemoteA2aAgent(
+                name=f"{self.name}_replica{index}",
+                agent_card=f"{url}{a2a_card_path()}",
+                description=self.description,
+                timeout=self.timeout_s
+            ))
+            for index, url in enumerate(self.endpoints)
+        ]
+    
+    def _pick(self, tried: List[A2aEndpoint]) -> Optional[A2aEndpoint]:
+        candidates = [member for member in self._members if member.healthy and member not in tried]
+        if not candidates:
+            return None
+        if self.balancing == "round_robin":
+            self._next += 1
+            return candidates[self._next % len(candidates)]
+        return min(candidates, key=lambda member: (member.in_flight, member.requests))
+    
+    def _record_failure(self, member: A2aEndpoint, error: str):
+        member.failures += 1
+        member.consecutive_failures += 1
+        member.last_error = error
+        if member.healthy and member.consecutive_failures >= self.unhealthy_after:
+            member.healthy = False
+            logger.warning(f"A2A endpoint {member.url} ({self.name}) marked unhealthy: {error}")
+    
+    async def _run_async_impl(self, ctx: Any) -> AsyncGenerator[Event, None]:
+        self._ensure_health_checks()
+        tried: List[A2aEndpoint] = []
+        while True:
+            member = self._pick(tried)
+            if member is None:
+                observer.increment("a2a.no_healthy_endpoint", agent_name=self.name)
+                yield Event(
+                    author=self.name,
+                    error_message=f"No healthy {self.name} endpoint available",
+                    invocation_id=ctx.invocation_id,
+                    branch=ctx.branch
+                )
+                return
+            tried.append(member)
+            member.in_flight += 1
+            member.requests += 1
+            started = time.perf_counter()
+            error: Optional[str] = None
+            yielded = False
+            try:
+                # run_async keeps the replica's callbacks, plugins and tracing;
+                # a failed call is drained rather than abandoned so they finish
+                async with contextlib.aclosing(member.agent.run_async(ctx)) as events:
+                    async for event in events:
+                        if error is not None:
+                            continue
+                        if event.error_message and not yielded:
+                            error = event.error_message
+                            continue
+                        yielded = True
+                        yield event
+            finally:
+                member.in_flight -= 1
+                observer.record_metric("a2a.latency_ms", (time.perf_counter() - started) * 1000, agent_name=self.name)
+            if error is None:
+                member.consecutive_failures = 0
+                return
+            self._record_failure(member, error)
+            observer.increment("a2a.failovers", agent_name=self.name)
+    
+    def _ensure_health_checks(self):
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+    
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval_s)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.error(f"A2A health check for {self.name} failed: {str(e)}")
+    
+    async def check_health(self) -> Dict[str, bool]:
+        """Probe every replica's agent card now; returns url -> healthy"""
+        import httpx
+        
+        async def probe(client: Any, member: A2aEndpoint):
+            try:
+                response = await client.get(f"{member.url}{a2a_card_path()}")
+                healthy = response.status_code == 200
+                error = None if healthy else f"HTTP {response.status_code}"
+            except httpx.HTTPError as e:
+                healthy, error = False, str(e) or type(e).__name__
+            if healthy and not member.healthy:
+                logger.info(f"A2A endpoint {member.url} ({self.name}) is healthy again")
+                member.consecutive_failures = 0
+            elif not healthy:
+                member.last_error = error
+            member.healthy = healthy
+        
+        async with httpx.AsyncClient(timeout=min(self.health_interval_s, 5.0)) as client:
+            await asyncio.gather(*(probe(client, member) for member in self._members))
+        return {member.url: member.healthy for member in self._members}
+    
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for member in self._members:
+            await member.agent.cleanup()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "balancing": self.balancing,
+            "healthy": sum(member.healthy for member in self._members),
+            "endpoints": {member.url: member.to_dict() for member in self._members},
+            "latency_ms": observer.get_histogram_summary("a2a.latency_ms", self.name)
+        }
+
+
+class VectorMemoryService(BaseMemoryService):
+    """
+    Persistent long-term memory with an embedded vector index
+    Embeddings live in a memory-mapped float32 matrix (vectors.f32) and
+    text/metadata in SQLite (memory.db) under `memory_dir`; with no
+    directory both stay in process. Memories are partitioned per
+    (app, customer), and each partition keeps at most `max_per_user`
+    entries newer than `max_age_seconds`, so a top-k cosine search
+    scans a bounded slice no matter how much total history exists.
+    Sessions are ingested incrementally: events already stored are
+    skipped when a session is added again.
+    """
+    
+    def __init__(
+        self,
+        memory_dir: Optional[str] = None,
+        dim: int = 512,
+        max_per_user: int = 2000,
+        max_age_seconds: Optional[float] = 90 * 24 * 3600,
+        top_k: int = 5,
+        min_score: float = 0.1,
+        embed: Optional[Callable[[List[str]], Any]] = None,
+        initial_capacity: int = 4096
+    ):
+        super().__init__()
+        self.memory_dir = memory_dir
+        self.dim = dim
+        self.max_per_user = max_per_user
+        self.max_age_seconds = max_age_seconds
+        self.top_k = top_k
+        self.min_score = min_score
+        self.embed = embed or functools.partial(hashing_embed, dim=dim)
+        self._lock = threading.Lock()
+        self._last_expiry_check = 0.0
+        
+        if memory_dir:
+            os.makedirs(memory_dir, exist_ok=True)
+            self._vector_path: Optional[str] = os.path.join(memory_dir, "vectors.f32")
+            self._db = sqlite3.connect(os.path.join(memory_dir, "memory.db"), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+        else:
+            self._vector_path = None
+            self._db = sqlite3.connect(":memory:", check_same_thread=False)
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS memories ("
+            "slot INTEGER PRIMARY KEY, app_name TEXT NOT NULL, user_id TEXT NOT NULL, "
+            "session_id TEXT, event_id TEXT, author TEXT, text TEXT NOT NULL, created_at REAL NOT NULL, "
+            "text_hash INTEGER)"
+        )
+        if "text_hash" not in {row[1] for row in self._db.execute("PRAGMA table_info(memories)")}:
+            # Stores written before texts were hashed
+            self._db.execute("ALTER TABLE memories ADD COLUMN text_hash INTEGER")
+            self._db.executemany(
+                "UPDATE memories SET text_hash = ? WHERE slot = ?",
+                [(self._text_hash(text), slot) for slot, text in self._db.execute("SELECT slot, text FROM memories")]
+            )
+        self._db.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_memories_event "
+            "ON memories(app_name, user_id, event_id)"
+        )
+        self._db.execute("DROP INDEX IF EXISTS idx_memories_session")
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_memories_session_text "
+            "ON memories(app_name, user_id, session_id, text_hash)"
+        )
+        self._db.commit()
+        
+        # Partition index: (app, user) -> slots, oldest first
+        self._partitions: Dict[Tuple[str, str], List[int]] = {}
+        high_water = 0
+        for slot, app_name, user_id in self._db.execute(
+            "SELECT slot, app_name, user_id FROM memories ORDER BY created_at, slot"
+        ):
+            self._partitions.setdefault((app_name, user_id), []).append(slot)
+            high_water = max(high_water, slot + 1)
+        used = {slot for slots in self._partitions.values() for slot in slots}
+        self._free_slots = [slot for slot in range(high_water) if slot not in used]
+        self._next_slot = high_water
+        self._open_vectors(max(initial_capacity, high_water))
+    
+    # Stay well under SQLite's bound-parameter limit per statement
+    _IN_CHUNK = 500
+    
+    @staticmethod
+    def _text_hash(text: str) -> int:
+        return zlib.crc32(text.encode("utf-8"))
+    
+    def _select_in(self, sql: str, params: List[Any], values: List[Any]) -> List[Tuple[Any, ...]]:
+        """Rows of `sql`, whose "IN ({})" is filled with `values` a chunk at a time"""
+        rows: List[Tuple[Any, ...]] = []
+        for start in range(0, len(values), self._IN_CHUNK):
+            chunk = values[start:start + self._IN_CHUNK]
+            rows.extend(self._db.execute(sql.format(",".join("?" * len(chunk))), [*params, *chunk]))
+        return rows
+    
+    def _open_vectors(self, capacity: int):
+        import numpy as np
+        if self._vector_path is None:
+            vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+            if getattr(self, "_vectors", None) is not None:
+                vectors[:len(self._vectors)] = self._vectors
+            self._vectors = vectors
+            return
+        needed = capacity * self.dim * 4
+        if getattr(self, "_vectors", None) is not None:
+            self._vectors.flush()
+            del self._vectors
+        with open(self._vector_path, "ab") as f:
+            if f.tell() < needed:
+                f.truncate(needed)
+        self._vectors = np.memmap(self._vector_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+    
+    def _allocate(self) -> int:
+        if self._free_slots:
+            return self._free_slots.pop()
+        if self._next_slot >= len(self._vectors):
+            self._open_vectors(len(self._vectors) * 2)
+        self._next_slot += 1
+        return self._next_slot - 1
+    
+    def _release(self, slots: List[int]):
+        if not slots:
+            return
+        self._db.executemany("DELETE FROM memories WHERE slot = ?", [(slot,) for slot in slots])
+        self._free_slots.extend(slots)
+    
+    def add_texts(
+        self,
+        app_name: str,
+        user_id: str,
+        items: List[Tuple[Optional[str], str, Optional[str], float]],
+        session_id: Optional[str] = None
+    ) -> int:
+        """Store (event_id, text, author, timestamp) items; returns how many were new"""
+        with self._lock:
+            # Skip events stored by an earlier ingestion of the same session,
+            # and texts the session already holds under another event ID
+            items = list({item[0] or item[1]: item for item in items if item[1].strip()}.values())
+            if session_id is not None and items:
+                stored_texts = {row[0] for row in self._select_in(
+                    "SELECT text FROM memories WHERE app_name = ? AND user_id = ? AND session_id = ? "
+                    "AND text_hash IN ({})",
+                    [app_name, user_id, session_id],
+                    list({self._text_hash(item[1]) for item in items})
+                )}
+                items = [item for item in items if item[1] not in stored_texts]
+            event_ids = [item[0] for item in items if item[0]]
+            if event_ids:
+                known = {row[0] for row in self._select_in(
+                    "SELECT event_id FROM memories WHERE app_name = ? AND user_id = ? AND event_id IN ({})",
+                    [app_name, user_id],
+                    event_ids
+                )}
+                items = [item for item in items if item[0] not in known]
+            if not items:
+                return 0
+            embeddings = self.embed([text for _, text, _, _ in items])
+            partition = self._partitions.setdefault((app_name, user_id), [])
+            rows = []
+            for (event_id, text, author, created_at), vector in zip(items, embeddings):
+                slot = self._allocate()
+                self._vectors[slot] = vector
+                partition.append(slot)
+                rows.append((
+                    slot, app_name, user_id, session_id, event_id, author, text, created_at, self._text_hash(text)
+                ))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO memories "
+                "(slot, app_name, user_id, session_id, event_id, author, text, created_at, text_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            if len(partition) > self.max_per_user:
+                overflow = len(partition) - self.max_per_user
+                self._release(partition[:overflow])
+                del partition[:overflow]
+                observer.increment("memory.evicted_size", overflow)
+            self._db.commit()
+            self._maybe_expire()
+        observer.increment("memory.ingested", len(rows))
+        return len(rows)
+    
+    def _maybe_expire(self):
+        now = time.time()
+        if self.max_age_seconds is None or now - self._last_expiry_check < 60:
+            return
+        self._last_expiry_check = now
+        self._expire(now - self.max_age_seconds)
+    
+    def _expire(self, cutoff: float) -> int:
+        expired = self._db.execute(
+            "SELECT slot, app_name, user_id FROM memories WHERE created_at < ?", (cutoff,)
+        ).fetchall()
+        by_partition: Dict[Tuple[str, str], set] = {}
+        for slot, app_name, user_id in expired:
+            by_partition.setdefault((app_name, user_id), set()).add(slot)
+        for key, slots in by_partition.items():
+            self._partitions[key] = [slot for slot in self._partitions.get(key, []) if slot not in slots]
+            if not self._partitions[key]:
+                del self._partitions[key]
+        self._release([slot for slot, _, _ in expired])
+        self._db.commit()
+        if expired:
+            observer.increment("memory.evicted_age", len(expired))
+        return len(expired)
+    
+    def evict_expired(self) -> int:
+        """Drop memories older than max_age_seconds now"""
+        if self.max_age_seconds is None:
+            return 0
+        with self._lock:
+            return self._expire(time.time() - self.max_age_seconds)
+    
+    @staticmethod
+    def _event_items(events: Iterable[Any]) -> List[Tuple[Optional[str], str, Optional[str], float]]:
+        items = []
+        for event in events:
+            if event.partial or not event.content or not event.content.parts:
+                continue
+            text = " ".join(part.text for part in event.content.parts if part.text)
+            if text.strip():
+                items.append((event.id, text, event.author, event.timestamp or time.time()))
+        return items
+    
+    async def add_session_to_memory(self, session: Any) -> None:
+        self.add_texts(session.app_name, session.user_id, self._event_items(session.events), session.id)
+    
+    async def add_events_to_memory(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        events: Any,
+        session_id: Optional[str] = None,
+        custom_metadata: Any = None
+    ) -> None:
+        self.add_texts(app_name, user_id, self._event_items(events), session_id)
+    
+    async def add_memory(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        memories: Any,
+        custom_metadata: Any = None
+    ) -> None:
+        self.add_texts(app_name, user_id, [
+            (memory.id, " ".join(part.text for part in memory.content.parts or [] if part.text),
+             memory.author, time.time())
+            for memory in memories
+        ])
+    
+    def search(self, app_name: str, user_id: str, query: str, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Top-k memories of one customer by cosine similarity to the query"""
+        import numpy as np
+        started = time.perf_counter()
+        top_k = top_k or self.top_k
+        query_vector = self.embed([query])[0]
+        with self._lock:
+            slots = np.asarray(self._partitions.get((app_name, user_id), []), dtype=np.int64)
+            if len(slots) == 0:
+                observer.record_metric("memory.search_ms", (time.perf_counter() - started) * 1000)
+                return []
+            scores = self._vectors[slots] @ query_vector
+            if len(slots) > top_k:
+                best = np.argpartition(-scores, top_k)[:top_k]
+            else:
+                best = np.arange(len(slots))
+            best = best[np.argsort(-scores[best])]
+            chosen = [(int(slots[i]), float(scores[i])) for i in best if scores[i] >= self.min_score]
+            rows = {
+                row[0]: row for row in self._db.execute(
+                    f"SELECT slot, session_id, event_id, author, text, created_at FROM memories "
+                    f"WHERE slot IN ({','.join('?' * len(chosen))})",
+                    [slot for slot, _ in chosen]
+                )
+            } if chosen else {}
+        observer.record_metric("memory.search_ms", (time.perf_counter() - started) * 1000)
+        return [
+            {
+                "slot": slot, "score": score, "session_id": rows[slot][1], "event_id": rows[slot][2],
+                "author": rows[slot][3], "text": rows[slot][4], "created_at": rows[slot][5]
+            }
+            for slot, score in chosen if slot in rows
+        ]
+    
+    async def search_memory(self, *, app_name: str, user_id: str, query: str) -> Any:
+        return SearchMemoryResponse(memories=[
+            MemoryEntry(
+                id=hit["event_id"],
+                author=hit["author"],
+                timestamp=datetime.fromtimestamp(hit["created_at"]).isoformat(),
+                content=types.Content(
+                    role="user" if hit["author"] == "user" else "model",
+                    parts=[types.Part(text=hit["text"])]
+                ),
+                custom_metadata={"score": hit["score"], "session_id": hit["session_id"]}
+            )
+            for hit in self.search(app_name, user_id, query)
+        ])
+    
+    def flush(self):
+        with self._lock:
+            if self._vector_path is not None:
+                self._vectors.flush()
+            self._db.commit()
+    
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._db.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sizes = [len(slots) for slots in self._partitions.values()]
+            return {
+                "memories": sum(sizes),
+                "partitions": len(sizes),
+                "largest_partition": max(sizes, default=0),
+                "capacity": len(self._vectors),
+                "dim": self.dim,
+                "persistent": self._vector_path is not None,
+                "search_ms": observer.get_histogram_summary("memory.search_ms")
+            }
+
+
+class MemoryRecallTool(BaseTool):
+    """
+    Adds the customer's relevant past conversations to each model request
+    Runs in process_llm_request (the model never calls it), so recall
+    costs one memory search per turn and no extra model round trip.
+    Memories from the current session are skipped since they are already
+    in the prompt; each recalled line is capped at `max_chars`.
+    """
+    
+    def __init__(self, max_chars: int = 300, cache_size: int = 1024):
+        super().__init__(name="memory_recall", description="Recall past conversations with the customer")
+        self.max_chars = max_chars
+        self.cache_size = cache_size
+        # invocation_id -> recalled lines, so the tool loop searches once per turn
+        self._recalled: "OrderedDict[str, List[str]]" = OrderedDict()
+    
+    async def _recall(self, tool_context: Any) -> List[str]:
+        lines = self._recalled.get(tool_context.invocation_id)
+        if lines is not None:
+            return lines
+        query = tool_context.state.get("user_query")
+        if not query and tool_context.user_content:
+            query = " ".join(part.text for part in tool_context.user_content.parts or [] if part.text)
+        lines = []
+        if query:
+            try:
+                response = await tool_context.search_memory(query)
+            except Exception as e:
+                logger.warning(f"Memory recall failed: {str(e)}")
+                response = None
+            session_id = tool_context.session.id
+            for memory in response.memories if response else []:
+                if (memory.custom_metadata or {}).get("session_id") == session_id:
+                    continue
+                text = " ".join(
+                    " ".join(part.text for part in memory.content.parts or [] if part.text).split()
+                )
+                if text:
+                    lines.append(f"{memory.author or 'unknown'}: {text[:self.max_chars]}")
+        self._recalled[tool_context.invocation_id] = lines
+        while len(self._recalled) > self.cache_size:
+            self._recalled.popitem(last=False)
+        observer.increment("memory.recalled", len(lines))
+        return lines
+    
+    async def process_llm_request(self, *, tool_context: Any, llm_request: Any) -> None:
+        lines = await self._recall(tool_context)
+        if lines:
+            llm_request.append_instructions([
+                MEMORY_RECALL_HEADER + "\n" + "\n".join(f"- {line}" for line in lines)
+            ])
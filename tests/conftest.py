@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the default customer store out of the working tree
+os.environ.setdefault(
+    "TELECOM_CUSTOMER_DB", os.path.join(tempfile.mkdtemp(prefix="telecom-tests-"), "customers.db")
+)
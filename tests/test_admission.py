@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+import pytest
+
+from telecom_agent_solution import (
+    AdmissionController, AdmissionRejected, CircuitBreaker, SimulatedModelError, TokenBucket
+)
+
+
+def test_token_bucket_refills_and_reports_wait():
+    bucket = TokenBucket(rate=2.0, burst=1.0)
+    now = bucket._updated
+    assert bucket.try_acquire(now) == 0.0
+    assert bucket.try_acquire(now) == pytest.approx(0.5)
+    assert bucket.try_acquire(now + 0.5) == 0.0
+
+
+def test_breaker_opens_on_consecutive_failures():
+    breaker = CircuitBreaker(consecutive_failures=3, min_calls=100, open_s=60)
+    for _ in range(2):
+        assert breaker.allow() == 0.0
+        breaker.record(False)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow() > 0
+
+
+def test_breaker_opens_on_failure_ratio():
+    breaker = CircuitBreaker(failure_ratio=0.5, window=4, min_calls=4, consecutive_failures=100)
+    for ok in (True, False, True, False):
+        breaker.record(ok)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_breaker_ignores_outcomes_that_never_reached_backend():
+    breaker = CircuitBreaker(consecutive_failures=1)
+    breaker.record(None)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker(consecutive_failures=1, open_s=0.02, half_open_probes=1)
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    
+    time.sleep(0.03)
+    assert breaker.allow() == 0.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() > 0  # only one probe at a time
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    
+    time.sleep(0.03)
+    assert breaker.allow() == 0.0
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["times_opened"] == 2
+
+
+def test_breaker_rejection_does_not_spend_rate_budget():
+    async def scenario():
+        breaker = CircuitBreaker(consecutive_failures=1, open_s=60)
+        controller = AdmissionController(global_rate=0.0, global_burst=2, customer_rate=0.0,
+                                         customer_burst=2, breaker=breaker)
+        breaker.record(False)
+        for _ in range(5):
+            with pytest.raises(AdmissionRejected) as rejected:
+                await controller.acquire("CUST001")
+            assert rejected.value.reason == "circuit_open"
+        breaker._close()
+        # Both tokens are still there after the shedding episode
+        await controller.acquire("CUST001")
+        controller.release()
+        await controller.acquire("CUST001")
+        controller.release()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("CUST001")
+        assert rejected.value.reason == "customer_rate"
+    
+    asyncio.run(scenario())
+
+
+def test_queue_full_refunds_tokens():
+    async def scenario():
+        controller = AdmissionController(global_rate=0.0, global_burst=3, customer_rate=0.0,
+                                         customer_burst=3, max_concurrent=1, max_queue=0)
+        await controller.acquire("CUST001")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("CUST001")
+        assert rejected.value.reason == "queue_full"
+        controller.release()
+        await controller.acquire("CUST001")
+        controller.release()
+        await controller.acquire("CUST001")
+        controller.release()
+        assert controller.stats()["admitted"] == 3
+    
+    asyncio.run(scenario())
+
+
+def test_release_feeds_backend_errors_to_breaker():
+    async def scenario():
+        controller = AdmissionController(breaker=CircuitBreaker(consecutive_failures=2))
+        for _ in range(2):
+            await controller.acquire("CUST001")
+            controller.release(SimulatedModelError("503 from model backend"))
+        assert controller.breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("CUST002")
+        assert rejected.value.reason == "circuit_open"
+    
+    asyncio.run(scenario())
+
+
+def test_controller_serves_successive_event_loops():
+    controller = AdmissionController(max_concurrent=1, queue_timeout_s=1.0)
+    
+    async def scenario():
+        await controller.acquire("CUST001")
+        waiter = asyncio.create_task(controller.acquire("CUST002"))
+        await asyncio.sleep(0.01)
+        assert controller.stats()["queued"] == 1
+        controller.release()
+        await waiter
+        controller.release()
+    
+    for _ in range(2):
+        asyncio.run(scenario())
+    assert controller.stats()["admitted"] == 4
+    assert controller.stats()["in_flight"] == 0
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import telecom_agent_solution as tas
+from telecom_agent_solution import BillingStore, InMemoryCustomerRepository
+
+
+# Shape of a bill in the original mock get_billing_history
+BASELINE_BILL_KEYS = {"month", "amount", "status"}
+
+
+@pytest.fixture
+def repository(monkeypatch):
+    repository = InMemoryCustomerRepository()
+    repository.upsert_many(list(tas.MOCK_CUSTOMERS.items()) + [
+        ("CUST900", {"name": "File Loaded", "plan": "Premium-399", "region": "Mumbai"})
+    ])
+    monkeypatch.setattr(tas, "_customer_repository", repository)
+    monkeypatch.delenv("TELECOM_BILLING_FILE", raising=False)
+    monkeypatch.setattr(tas, "_billing_store", None)
+    monkeypatch.setattr(tas, "_billing_store_is_mock", False)
+    monkeypatch.setattr(tas, "_mock_bill_stores", {})
+    return repository
+
+
+@pytest.mark.parametrize("customer_id", ["CUST001", "CUST900"])
+def test_history_matches_baseline_shape(repository, customer_id):
+    result = tas.get_billing_history(customer_id, months=3)
+    assert result["status"] == "success"
+    assert result["customer_id"] == customer_id
+    assert len(result["bills"]) == 3
+    assert all(set(bill) == BASELINE_BILL_KEYS for bill in result["bills"])
+    assert result["bills"][0]["status"] == "Due"
+    assert all(bill["status"] == "Paid" for bill in result["bills"][1:])
+
+
+def test_repository_customer_billed_at_plan_price(repository):
+    bills = tas.get_billing_history("CUST900", months=6)["bills"]
+    assert all(399 <= bill["amount"] <= 399 * 1.1 for bill in bills)
+    summaries = tas.get_billing_summaries(["CUST900", "NOPE"])
+    assert list(summaries["summaries"]) == ["CUST900"]
+    assert summaries["missing"] == ["NOPE"]
+
+
+def test_unknown_customer_has_no_history(repository):
+    assert tas.get_billing_history("NOPE")["status"] == "error"
+
+
+def test_concurrent_first_use_builds_one_store(repository):
+    stores = []
+    threads = [
+        threading.Thread(target=lambda: stores.append(tas.get_billing_store()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(store) for store in stores}) == 1
+
+
+def test_repository_customers_leave_the_seed_store_alone(repository):
+    store = tas.get_billing_store()
+    tas.get_billing_history("CUST900")
+    summaries = tas.get_billing_summaries(["CUST001", "CUST900"])["summaries"]
+    assert list(summaries) == ["CUST001", "CUST900"]
+    assert tas.get_billing_store() is store
+    assert "CUST900" not in store
+
+
+def test_configured_store_is_authoritative(repository):
+    tas.configure_billing_store(BillingStore.from_records([("CUST001", "Jan-2026", 250.0, "Paid")]))
+    assert tas.get_billing_history("CUST900")["status"] == "error"
+    assert tas.get_billing_history("CUST001")["bills"] == [
+        {"month": "Jan-2026", "amount": 250.0, "status": "Paid"}
+    ]
+
+
+def test_summary_matches_plain_python(repository):
+    store = BillingStore.from_records([
+        ("A", "Jan-2026", 100.0, "Paid"),
+        ("A", "Feb-2026", 110.0, "Paid"),
+        ("A", "Mar-2026", 400.0, "Due"),
+        ("B", "Mar-2026", 50.0, "Due")
+    ])
+    summary = store.summarize("A", months=3)
+    assert summary["total"] == pytest.approx(610.0)
+    assert summary["latest"] == pytest.approx(400.0)
+    assert summary["spike"] is True
+    assert [bill["month"] for bill in store.history("A", 2)] == ["Mar-2026", "Feb-2026"]
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import telecom_agent_solution as tas
+from telecom_agent_solution import (
+    CachedCustomerRepository, CustomerRepository, InMemoryCustomerRepository, SQLiteCustomerRepository
+)
+
+
+MODULE_DIR = os.path.dirname(os.path.abspath(tas.__file__))
+
+
+def test_import_has_no_filesystem_side_effects(tmp_path):
+    env = {key: value for key, value in os.environ.items() if key != "TELECOM_CUSTOMER_DB"}
+    env["PYTHONPATH"] = MODULE_DIR
+    subprocess.run([sys.executable, "-c", "import telecom_agent_solution"], cwd=tmp_path, env=env, check=True)
+    assert os.listdir(tmp_path) == []
+
+
+def test_interface_cannot_be_instantiated():
+    with pytest.raises(TypeError):
+        CustomerRepository()
+
+
+def test_sqlite_repository_round_trips_and_indexes_phone(tmp_path):
+    repository = SQLiteCustomerRepository(str(tmp_path / "customers.db"))
+    repository.upsert_many([("C1", {"phone": "+911", "family_plans": ["C2"]}), ("C2", {"phone": "+912"})])
+    assert repository.get("C1") == {"phone": "+911", "family_plans": ["C2"]}
+    assert repository.get_by_phone("+912") == {"phone": "+912"}
+    assert set(repository.get_many(["C1", "C2", "C3"])) == {"C1", "C2"}
+    assert repository.count() == 2
+    repository.close()
+
+
+def test_cache_serves_hits_and_drops_written_records():
+    backend = InMemoryCustomerRepository()
+    backend.upsert_many([("C1", {"plan": "Basic-99"})])
+    cached = CachedCustomerRepository(backend, capacity=1)
+    cached.get("C1")
+    cached.get("C1")
+    assert cached.stats()["hits"] == 1
+    cached.upsert_many([("C1", {"plan": "Premium-199"})])
+    assert cached.get("C1") == {"plan": "Premium-199"}
+
+
+def test_configured_repository_backs_the_tools(monkeypatch):
+    repository = InMemoryCustomerRepository()
+    repository.upsert_many([("C9", {"name": "Test", "plan": "Basic-99"})])
+    monkeypatch.setattr(tas, "_customer_repository", None)
+    tas.configure_customer_repository(repository)
+    assert tas.get_customer_repository() is repository
+    assert tas.get_customer_profile("C9")["status"] == "success"
@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+import telecom_agent_solution as tas
+from telecom_agent_solution import HouseholdResolver, InMemoryCustomerRepository
+
+
+class CountingRepository(InMemoryCustomerRepository):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+    
+    def get_many(self, customer_ids):
+        self.batches.append(list(customer_ids))
+        return super().get_many(customer_ids)
+
+
+@pytest.fixture
+def repository(monkeypatch):
+    repository = CountingRepository()
+    # H1 heads the household; H2 and H3 link up to it, H4 hangs off H3
+    repository.upsert_many([
+        ("H1", {"name": "Head", "plan": "Family-599", "balance": 100.0, "family_plans": ["H2", "H3"]}),
+        ("H2", {"name": "Spouse", "plan": "Family-599", "balance": 20.0, "parent_account": "H1"}),
+        ("H3", {"name": "Child", "plan": "Basic-99", "balance": 5.0, "parent_account": "H1",
+                "family_plans": ["H4", "GONE"]}),
+        ("H4", {"name": "Grandchild", "plan": "Basic-99", "balance": 0.0, "parent_account": "H3"})
+    ])
+    monkeypatch.setattr(tas, "_customer_repository", repository)
+    monkeypatch.delenv("TELECOM_BILLING_FILE", raising=False)
+    monkeypatch.setattr(tas, "_billing_store", None)
+    monkeypatch.setattr(tas, "_billing_store_is_mock", False)
+    monkeypatch.setattr(tas, "_mock_bill_stores", {})
+    return repository
+
+
+def test_household_costs_one_batch_per_level(repository):
+    household = HouseholdResolver().resolve("H4")
+    
+    assert household["household_id"] == "H1"
+    assert sorted(member["customer_id"] for member in household["members"]) == ["H1", "H2", "H3", "H4"]
+    assert household["missing_members"] == ["GONE"]
+    assert household["aggregate"]["total_balance"] == 125.0
+    # H4, then H3, then H1 and GONE, then H2; billing looks the members up once more
+    assert household["fetches"] == 4
+    assert [sorted(batch) for batch in repository.batches[:4]] == [["H4"], ["H3"], ["GONE", "H1"], ["H2"]]
+
+
+def test_household_is_cached_for_every_member(repository):
+    resolver = HouseholdResolver()
+    assert resolver.resolve("H1")["cached"] is False
+    batches = len(repository.batches)
+    assert resolver.resolve("H2")["cached"] is True
+    assert len(repository.batches) == batches
+    
+    resolver.invalidate_customer("H3")
+    assert resolver.resolve("H2")["cached"] is False
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("google.adk")
+
+from telecom_agent_adk import VectorMemoryService
+
+
+def _items(*texts):
+    now = time.time()
+    return [(f"evt-{index}", text, "user", now) for index, text in enumerate(texts)]
+
+
+def test_ingest_and_recall_per_customer(tmp_path):
+    memory = VectorMemoryService(memory_dir=str(tmp_path))
+    assert memory.add_texts("app", "CUST001", _items(
+        "My international roaming pack for Dubai was charged but never activated",
+        "Please send the invoice for last month"
+    ), session_id="s1") == 2
+    memory.add_texts("app", "CUST002", _items("Roaming pack for Dubai works fine"), session_id="s2")
+    
+    hits = memory.search("app", "CUST001", "dubai roaming pack not active")
+    assert hits[0]["text"].startswith("My international roaming pack")
+    assert hits[0]["session_id"] == "s1"
+    assert {hit["event_id"] for hit in hits} <= {"evt-0", "evt-1"}
+    assert memory.search("app", "CUST003", "dubai roaming") == []
+    
+    # Reopening the directory recalls the same memories
+    memory.close()
+    reopened = VectorMemoryService(memory_dir=str(tmp_path))
+    assert reopened.search("app", "CUST001", "dubai roaming pack")[0]["event_id"] == "evt-0"
+    assert reopened.stats()["memories"] == 3
+
+
+def test_reingesting_a_session_skips_stored_events_and_texts():
+    memory = VectorMemoryService()
+    items = _items("My data stopped working", "Restart your phone")
+    assert memory.add_texts("app", "CUST001", items, session_id="s1") == 2
+    assert memory.add_texts("app", "CUST001", items, session_id="s1") == 0
+    # Same text under no (or another) event ID in the same session, and repeats within a batch
+    assert memory.add_texts("app", "CUST001", [
+        (None, "My data stopped working", "user", time.time()),
+        (None, "Still broken", "user", time.time()),
+        (None, "Still broken", "user", time.time())
+    ], session_id="s1") == 1
+    assert memory.stats()["memories"] == 3
+
+
+def test_search_memory_returns_adk_entries():
+    memory = VectorMemoryService()
+    memory.add_texts("app", "CUST001", _items("Bill was charged twice for the same month"), session_id="s1")
+    response = asyncio.run(memory.search_memory(app_name="app", user_id="CUST001", query="charged twice"))
+    assert [entry.content.parts[0].text for entry in response.memories] == [
+        "Bill was charged twice for the same month"
+    ]
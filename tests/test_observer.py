@@ -0,0 +1,21 @@
+import math
+
+from telecom_agent_solution import StreamingHistogram, TelecommunicationObserver
+
+
+def test_histogram_drops_non_finite_values():
+    histogram = StreamingHistogram()
+    for value in (10.0, math.nan, math.inf, -math.inf, 20.0):
+        histogram.add(value)
+    summary = histogram.summary()
+    assert summary["count"] == 2
+    assert summary["sum"] == 30.0
+    assert summary["max"] == 20.0
+
+
+def test_record_metric_accepts_nan_latency():
+    observer = TelecommunicationObserver(event_capacity=1)
+    observer.record_metric("latency_ms", math.nan, agent_name="Billing")
+    observer.record_metric("latency_ms", 5.0)
+    assert observer.get_histogram_summary("latency_ms")["count"] == 1
+    assert observer.get_histogram_summary("latency_ms", "Billing")["count"] == 0
@@ -0,0 +1,73 @@
+import json
+import os
+
+from telecom_agent_solution import PlanCatalog
+
+
+PLANS = {
+    "Delhi": {
+        "Premium-199": {"price": 199, "data": "3GB/day", "validity": "28 days"},
+        "Basic-99": {"price": 99, "data": "1.5GB/day", "validity": "28 days"}
+    }
+}
+
+
+def _write(path, text, mtime):
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(text)
+    os.utime(path, (mtime, mtime))
+
+
+def test_budget_lookup_is_cheapest_first():
+    catalog = PlanCatalog(plans=PLANS)
+    assert list(catalog.plans_within_budget("Delhi", 200)) == ["Basic-99", "Premium-199"]
+    assert list(catalog.plans_within_budget("Delhi", 150)) == ["Basic-99"]
+    assert catalog.plans_within_budget("Chennai", 500) == {}
+
+
+def test_reload_picks_up_changed_file(tmp_path):
+    path = str(tmp_path / "plans.json")
+    _write(path, json.dumps(PLANS), 1000)
+    catalog = PlanCatalog(path=path, reload_interval=0)
+    assert list(catalog.plans_within_budget("Delhi", 100)) == ["Basic-99"]
+    
+    updated = {"Delhi": {"Basic-79": {"price": 79, "data": "1GB/day", "validity": "28 days"}}}
+    _write(path, json.dumps(updated), 2000)
+    assert list(catalog.plans_within_budget("Delhi", 100)) == ["Basic-79"]
+    assert catalog.reload() is False
+
+
+def test_malformed_file_keeps_last_good_index(tmp_path):
+    path = str(tmp_path / "plans.json")
+    _write(path, json.dumps(PLANS), 1000)
+    catalog = PlanCatalog(path=path, reload_interval=0)
+    
+    _write(path, json.dumps(PLANS)[:20], 2000)
+    assert catalog.reload() is False
+    assert list(catalog.plans_within_budget("Delhi", 100)) == ["Basic-99"]
+    
+    _write(path, json.dumps({"Delhi": {"Broken": {"data": "1GB/day"}}}), 3000)
+    assert list(catalog.plans_within_budget("Delhi", 100)) == ["Basic-99"]
+    
+    _write(path, json.dumps(PLANS), 4000)
+    assert catalog.reload() is True
+
+
+def test_bad_file_is_parsed_once_per_change(tmp_path, monkeypatch):
+    path = str(tmp_path / "plans.json")
+    _write(path, "{", 1000)
+    catalog = PlanCatalog(plans=PLANS, path=path, reload_interval=0)
+    assert list(catalog.plans_within_budget("Delhi", 100)) == ["Basic-99"]
+    
+    opened = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda *a, **k: opened.append(a[0]) or real_open(*a, **k))
+    catalog.plans_within_budget("Delhi", 100)
+    catalog.plans_within_budget("Delhi", 100)
+    assert opened == []
+
+
+def test_missing_file_serves_defaults_and_throttles_stat(tmp_path):
+    catalog = PlanCatalog(plans=PLANS, path=str(tmp_path / "absent.json"), reload_interval=60)
+    assert list(catalog.plans_within_budget("Delhi", 100)) == ["Basic-99"]
+    assert catalog._last_check > 0
@@ -0,0 +1,78 @@
+import asyncio
+
+import telecom_agent_solution as tas
+from telecom_agent_solution import PlanChangePipeline, TicketIdGenerator
+
+
+def test_ticket_ids_are_unique_and_monotonic():
+    generator = TicketIdGenerator()
+    issued = [generator.issue("CUST001") for _ in range(1000)]
+    assert len(set(issued)) == len(issued)
+    assert issued == sorted(issued)
+
+
+def test_same_idempotency_key_returns_same_ticket():
+    generator = TicketIdGenerator()
+    first, created = generator.issue_once("CUST001", "req-1")
+    again, created_again = generator.issue_once("CUST001", "req-1")
+    assert (again, created, created_again) == (first, True, False)
+    assert generator.issue("CUST001", "req-2") != first
+
+
+def test_reserved_ticket_is_created_on_first_issue():
+    generator = TicketIdGenerator()
+    reserved = generator.reserve("CUST001", "req-1")
+    assert generator.issue_once("CUST001", "req-1") == (reserved, True)
+    assert generator.issue_once("CUST001", "req-1") == (reserved, False)
+
+
+def test_remembered_ticket_survives_restart():
+    generator = TicketIdGenerator()
+    generator.remember("req-1", "TKT-CUST001-1")
+    assert generator.issue_once("CUST001", "req-1") == ("TKT-CUST001-1", True)
+
+
+def test_eviction_forgets_old_keys():
+    generator = TicketIdGenerator(capacity=2)
+    first = generator.issue("CUST001", "a")
+    generator.issue("CUST001", "b")
+    generator.issue("CUST001", "c")
+    assert generator.issue("CUST001", "a") != first
+
+
+def test_resubmit_does_not_invalidate_or_log_again(monkeypatch):
+    changed = []
+    monkeypatch.setattr(tas, "ticket_ids", TicketIdGenerator())
+    monkeypatch.setattr(tas, "notify_customer_changed", changed.append)
+    first = tas.submit_plan_change_request("CUST001", "Premium-399", "2026-11-01", request_id="r1")
+    second = tas.submit_plan_change_request("CUST001", "Premium-399", "2026-11-01", request_id="r1")
+    assert first["ticket_id"] == second["ticket_id"]
+    assert changed == ["CUST001"]
+
+
+def test_pipeline_reports_rows_without_customer_id(monkeypatch):
+    changed = []
+    monkeypatch.setattr(tas, "ticket_ids", TicketIdGenerator())
+    monkeypatch.setattr(tas, "notify_customer_changed", changed.append)
+    pipeline = PlanChangePipeline(new_plan="Premium-199", batch_size=10)
+    rows = [{"customer_id": "CUST001"}, {"new_plan": "Basic-99"}, {"customer_id": ""}, "CUST999"]
+    
+    results = []
+    original = pipeline._process_batch
+    
+    async def capture(batch):
+        batch_results = await original(batch)
+        results.extend(batch_results)
+        return batch_results
+    
+    pipeline._process_batch = capture
+    summary = asyncio.run(pipeline.run(rows))
+    
+    assert summary["rows_processed"] == 4
+    assert summary["succeeded_total"] == 1
+    by_row = {result["row"]: result for result in results}
+    assert by_row[0]["status"] == "success"
+    assert by_row[1]["stage"] == by_row[2]["stage"] == "validate"
+    assert by_row[3]["stage"] == "profile"
+    # The write-ahead reservation must not suppress the real submission
+    assert changed == ["CUST001"]
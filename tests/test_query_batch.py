@@ -0,0 +1,64 @@
+import asyncio
+import random
+
+from telecom_agent_solution import QueryBatch
+
+
+class FakeApp:
+    """Records when each query runs; sleeps a random, query-specific time"""
+    
+    def __init__(self):
+        self.running = {}
+        self.peak = 0
+        self.order = {}
+        self.overlaps = []
+    
+    async def handle_customer_query(self, customer_id, query, session_id=None):
+        if self.running.get(customer_id):
+            self.overlaps.append((customer_id, query))
+        self.running[customer_id] = self.running.get(customer_id, 0) + 1
+        self.peak = max(self.peak, sum(self.running.values()))
+        await asyncio.sleep(random.Random(query).uniform(0, 0.005))
+        self.order.setdefault(customer_id, []).append(query)
+        self.running[customer_id] -= 1
+        return {"status": "error" if query.endswith("-fail") else "success",
+                "customer_id": customer_id, "query": query}
+
+
+def _run(app, queries, **kwargs):
+    async def collect():
+        batch = QueryBatch(app, queries, **kwargs)
+        results = [result async for result in batch]
+        return results, batch.summary
+    return asyncio.run(collect())
+
+
+def test_same_customer_queries_run_in_arrival_order():
+    app = FakeApp()
+    queries = [(f"C{index % 5}", f"C{index % 5}-q{index}") for index in range(100)]
+    results, summary = _run(app, queries, concurrency=8, max_pending=16)
+    
+    assert len(results) == summary["total_queries"] == 100
+    assert app.overlaps == []
+    for customer_id, handled in app.order.items():
+        assert handled == [query for cid, query in queries if cid == customer_id]
+    assert app.peak <= 5
+
+
+def test_concurrency_is_bounded_across_customers():
+    app = FakeApp()
+    queries = [{"customer_id": f"C{index}", "query": f"q{index}"} for index in range(64)]
+    _run(app, queries, concurrency=4, max_pending=8)
+    assert app.peak <= 4
+
+
+def test_async_source_and_failure_counts():
+    async def source():
+        for index in range(10):
+            yield ("C1", f"q{index}-fail" if index % 3 == 0 else f"q{index}")
+    
+    app = FakeApp()
+    results, summary = _run(app, source(), concurrency=2, max_pending=4)
+    assert [result["query"] for result in results] == app.order["C1"]
+    assert summary["failed"] == 4
+    assert summary["succeeded"] == 6
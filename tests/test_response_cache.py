@@ -0,0 +1,55 @@
+import pytest
+
+import telecom_agent_solution as tas
+from telecom_agent_solution import ResponseCache
+
+
+@pytest.fixture
+def cache():
+    cache = ResponseCache(capacity=3, ttl_seconds=60)
+    tas.customer_change_listeners.append(cache.invalidate_customer)
+    yield cache
+    tas.customer_change_listeners.remove(cache.invalidate_customer)
+
+
+def test_key_normalizes_query_text(cache):
+    assert cache.make_key("CUST001", "What is my BILL?", None) == cache.make_key("CUST001", "what is  my bill", None)
+    assert cache.make_key("CUST001", "my bill", "BILLING") != cache.make_key("CUST001", "my bill", None)
+
+
+def test_entries_are_not_shared_between_customers(cache):
+    # Unknown customers fingerprint identically; the customer ID still separates them
+    first = cache.make_key("NOPE-1", "my bill", None)
+    second = cache.make_key("NOPE-2", "my bill", None)
+    assert first != second
+    cache.put(first, "answer for NOPE-1")
+    assert cache.get(second) is None
+    assert cache.get(first) == "answer for NOPE-1"
+
+
+def test_notify_customer_changed_invalidates_only_that_customer(cache):
+    mine = cache.make_key("CUST001", "my bill", None)
+    theirs = cache.make_key("CUST002", "my bill", None)
+    cache.put(mine, "a")
+    cache.put(theirs, "b")
+    tas.notify_customer_changed("CUST001")
+    assert cache.get(mine) is None
+    assert cache.get(theirs) == "b"
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_eviction_prunes_customer_index(cache):
+    for index in range(10):
+        cache.put(cache.make_key(f"C{index}", "my bill", None), "x")
+    assert cache.stats()["size"] == 3
+    assert cache.stats()["evictions"] == 7
+    assert set(cache._keys_by_customer) == {"C7", "C8", "C9"}
+
+
+def test_expiry_prunes_customer_index(cache):
+    cache.ttl_seconds = -1
+    key = cache.make_key("CUST001", "my bill", None)
+    cache.put(key, "stale")
+    assert cache.get(key) is None
+    assert cache.stats()["expired"] == 1
+    assert cache._keys_by_customer == {}
@@ -0,0 +1,34 @@
+import pytest
+
+from telecom_agent_solution import QueryRouter, TelecomAgentApp, observer
+
+
+def test_confident_and_ambiguous_queries():
+    router = QueryRouter()
+    billing = router.classify("Why is my bill so high this month?")
+    assert (billing.category, billing.confident) == ("BILLING", True)
+    hinglish = router.classify("net nahi chal raha since morning")
+    assert (hinglish.category, hinglish.confident) == ("TECHNICAL", True)
+    # Billing and network words in one query: no category clearly wins
+    assert router.classify("extra charges on my bill and no signal").confident is False
+    assert router.classify("hello there").confident is False
+
+
+def test_route_splits_between_specialists_and_orchestrator():
+    pytest.importorskip("google.adk")
+    from telecom_agent_adk import OfflineLlm
+    
+    observer.reset_metrics()
+    app = TelecomAgentApp(use_persistent_storage=False, model=OfflineLlm(), query_router=QueryRouter())
+    
+    runner, intent = app._route("I want to upgrade my plan", None)
+    assert (runner.agent.name, intent) == ("PlanAdvisor", "PLAN_CHANGE")
+    runner, intent = app._route("hello there", None)
+    assert (runner, intent) == (app.runner, None)
+    # A caller-supplied intent is trusted and left to the orchestrator
+    runner, intent = app._route("Why is my bill so high?", "BILLING")
+    assert (runner, intent) == (app.runner, "BILLING")
+    
+    stats = app.query_router.stats()
+    assert (stats["routed"], stats["fallbacks"], stats["route_rate"]) == (1, 1, 0.5)
+    assert observer.metrics["counters"]["router.routed.PLAN_CHANGE"] == 1
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("google.adk")
+from google.adk.sessions import InMemorySessionService
+
+from telecom_agent_solution import SessionAccessLayer
+
+
+class CountingSessionService(InMemorySessionService):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+    
+    async def create_session(self, **kwargs):
+        self.calls.append("create_session")
+        return await super().create_session(**kwargs)
+    
+    async def get_session(self, **kwargs):
+        self.calls.append("get_session")
+        return await super().get_session(**kwargs)
+
+
+def test_get_or_create_hit_and_miss():
+    async def scenario():
+        service = CountingSessionService()
+        await service.create_session(app_name="app", user_id="CUST001", session_id="existing")
+        service.calls.clear()
+        sessions = SessionAccessLayer(service, app_name="app")
+        
+        # Miss: created in one call
+        assert await sessions.get_or_create("CUST001", "fresh") == "fresh"
+        assert service.calls == ["create_session"]
+        assert await service.get_session(app_name="app", user_id="CUST001", session_id="fresh") is not None
+        
+        # Existing but not cached: still one call
+        service.calls.clear()
+        assert await sessions.get_or_create("CUST001", "existing") == "existing"
+        assert service.calls == ["create_session"]
+        
+        # Cached: no storage call at all
+        service.calls.clear()
+        assert await sessions.get_or_create("CUST001", "existing") == "existing"
+        assert service.calls == []
+        assert sessions.stats() == {"cache_hits": 1, "round_trips": 2, "cached_sessions": 2}
+    
+    asyncio.run(scenario())
+
+
+def test_forgotten_and_expired_sessions_go_back_to_storage():
+    async def scenario():
+        service = CountingSessionService()
+        sessions = SessionAccessLayer(service, app_name="app", ttl_seconds=0.0, capacity=1)
+        await sessions.get_or_create("CUST001", "a")
+        await sessions.get_or_create("CUST001", "a")
+        assert sessions.stats()["cache_hits"] == 0
+        
+        sessions.ttl_seconds = 300.0
+        await sessions.get_or_create("CUST001", "b")
+        sessions.forget("CUST001", "b")
+        await sessions.get_or_create("CUST001", "b")
+        assert service.calls == ["create_session"] * 4
+    
+    asyncio.run(scenario())
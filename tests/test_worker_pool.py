@@ -0,0 +1,45 @@
+import asyncio
+import os
+
+from telecom_agent_solution import WorkerPool
+
+
+class FakeApp:
+    """Answers with the worker process it ran in"""
+    
+    use_persistent_storage = False
+    
+    def __init__(self, memory_dir):
+        self.memory_dir = memory_dir
+    
+    async def handle_customer_query(self, customer_id, query, session_id=None):
+        await asyncio.sleep(0.001)
+        return {"status": "success", "customer_id": customer_id, "query": query, "pid": os.getpid()}
+
+
+def test_customers_stay_on_their_shard(tmp_path):
+    pool = WorkerPool(workers=2, app_factory=FakeApp, app_kwargs={"memory_dir": str(tmp_path)},
+                      concurrency_per_worker=4)
+    customers = [f"CUST{index:03d}" for index in range(12)]
+    
+    async def scenario():
+        pool.start()
+        try:
+            batch = pool.handle_customer_queries(
+                [(customer_id, f"q{turn}") for turn in range(3) for customer_id in customers],
+                concurrency=8
+            )
+            return [result async for result in batch]
+        finally:
+            await pool.close(timeout_s=30.0)
+    
+    results = asyncio.run(scenario())
+    assert len(results) == 36
+    assert all(result["status"] == "success" for result in results)
+    placements = {}
+    for result in results:
+        placements.setdefault(result["customer_id"], set()).add((result["worker"], result["pid"]))
+    for customer_id, placed in placements.items():
+        assert len(placed) == 1
+        assert next(iter(placed))[0] == pool.shard_for(customer_id)
+    assert {worker for placed in placements.values() for worker, _ in placed} == {0, 1}